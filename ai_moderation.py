@@ -1,34 +1,72 @@
-import os
+import asyncio
+import json
 
-import google.generativeai as genai
-from dotenv import load_dotenv
-from google.generativeai import configure
-
-from config import PROMPT_FOR_PROFANITY
+from config import (
+    MODERATION_FAIL_POLICY,
+    PROMPT_FOR_PROFANITY,
+    PROMPT_FOR_PROFANITY_BATCH,
+)
+from llm_client import ModelCallError, moderation_client
 from loguru import logger
 
 logger.add("loguru/ai_moderation.log")
 
-load_dotenv()
 
-api_key = os.getenv("GOOGLE_API_KEY")
-logger.info("Using API KEY:", api_key)
+def render_prompt(template: str, **values: str) -> str:
+    """Fill ``{name}`` placeholders; values without one are appended."""
+    prompt = template
+    for name, value in values.items():
+        placeholder = "{" + name + "}"
+        if placeholder in prompt:
+            prompt = prompt.replace(placeholder, value)
+        else:
+            prompt += f"\n{value}"
+    return prompt
 
-configure(api_key=api_key)
-logger.info("genai.configure success")
 
-# model = genai.GenerativeModel("gemini-1.5-pro-latest")
-model = genai.GenerativeModel("gemini-1.5-flash")
+def moderation_unavailable(error: Exception) -> bool:
+    """Verdict to use when the model cannot answer: block only if fail-closed."""
+    blocked = MODERATION_FAIL_POLICY == "closed"
+    logger.warning(
+        f"AI moderation unavailable ({error}), failing "
+        f"{'closed: blocking' if blocked else 'open: allowing'} content"
+    )
+    return blocked
 
 
 async def check_for_profanity(text: str) -> bool:
     logger.info("check_for_profanity is running!")
     try:
+        response = await moderation_client.generate(
+            render_prompt(PROMPT_FOR_PROFANITY, text=text)
+        )
+    except ModelCallError as e:
+        return moderation_unavailable(e)
+    result = response.strip().lower()
+    logger.info("AI MODERATION RAW RESPONSE:", repr(result))
+    return result == "true"
+
+
+async def check_for_profanity_batch(texts: list[str]) -> list[bool]:
+    """Moderate several texts with one model call.
 
-        response = await model.generate_content_async(PROMPT_FOR_PROFANITY)
-        result = response.text.strip().lower()
-        logger.info("AI MODERATION RAW RESPONSE:", repr(result))
-        return result == "true"
-    except Exception as e:
-        logger.info("AI moderation error:", e)
-        return False
+    Falls back to one call per text if the model does not answer with a JSON
+    array of booleans of the right length.
+    """
+    logger.info(f"check_for_profanity_batch is running for {len(texts)} texts!")
+    prompt = PROMPT_FOR_PROFANITY_BATCH + "\n".join(
+        f"{number}. {json.dumps(text)}" for number, text in enumerate(texts, 1)
+    )
+    try:
+        response = await moderation_client.generate(prompt)
+    except ModelCallError as e:
+        return [moderation_unavailable(e)] * len(texts)
+    raw = response.strip().strip("`").removeprefix("json").strip()
+    try:
+        verdicts = json.loads(raw)
+        if len(verdicts) == len(texts) and all(isinstance(v, bool) for v in verdicts):
+            return verdicts
+    except (TypeError, ValueError):
+        pass
+    logger.info("AI batch moderation returned malformed verdicts:", repr(raw))
+    return list(await asyncio.gather(*(check_for_profanity(t) for t in texts)))
@@ -0,0 +1,232 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import deque
+from typing import Iterable, Protocol
+
+import httpx
+
+from config import (
+    AUTO_REPLY_PROVIDER,
+    GEMINI_MODEL,
+    LLAMACPP_URL,
+    MODERATION_PROVIDER,
+    PROVIDER_HEDGE_DELAY,
+)
+from loguru import logger
+
+logger.add("loguru/ai_providers.log")
+
+
+class ModelProvider(Protocol):
+    name: str
+
+    async def generate(self, prompt: str) -> str:
+        """Return the model's text completion for ``prompt``."""
+
+
+class LatencyStats:
+    """Call counts and a sliding window of latencies for one provider."""
+
+    def __init__(self, window: int = 1000) -> None:
+        self.calls = 0
+        self.errors = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.calls += 1
+        self.errors += not ok
+        self._latencies.append(seconds)
+
+    def record_error(self) -> None:
+        """Count a failed call that has no latency of its own to report."""
+        self.calls += 1
+        self.errors += 1
+
+    def percentile(self, q: float) -> float | None:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> dict[str, float | int | None]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "p50_ms": _ms(self.percentile(0.5)),
+            "p95_ms": _ms(self.percentile(0.95)),
+            "p99_ms": _ms(self.percentile(0.99)),
+        }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+provider_metrics: dict[str, LatencyStats] = {}
+
+
+class MeteredProvider:
+    """Records latency and errors of every call into ``provider_metrics``."""
+
+    def __init__(self, provider: ModelProvider) -> None:
+        self.provider = provider
+        self.name = provider.name
+        self.stats = provider_metrics.setdefault(provider.name, LatencyStats())
+
+    async def generate(self, prompt: str) -> str:
+        started = time.perf_counter()
+        ok = False
+        try:
+            text = await self.provider.generate(prompt)
+            ok = True
+            return text
+        finally:
+            self.stats.record(time.perf_counter() - started, ok)
+
+
+class GeminiProvider:
+    """Google Gemini through one long-lived client, so channels are reused."""
+
+    def __init__(self, model_name: str = GEMINI_MODEL) -> None:
+        self.name = f"gemini:{model_name}"
+        self.model_name = model_name
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+            self._model = genai.GenerativeModel(self.model_name)
+            logger.info(f"genai model {self.model_name} configured")
+        return self._model
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+
+class LlamaCppProvider:
+    """Local CPU inference through a llama.cpp ``/completion`` HTTP server.
+
+    One pooled ``httpx.AsyncClient`` keeps connections to the server alive
+    between calls.
+    """
+
+    def __init__(
+        self,
+        base_url: str = LLAMACPP_URL,
+        max_tokens: int = 128,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
+        self.name = "llamacpp"
+        self.max_tokens = max_tokens
+        self.client = client or httpx.AsyncClient(
+            base_url=base_url,
+            timeout=None,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+        )
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.client.post(
+            "/completion",
+            json={"prompt": prompt, "n_predict": self.max_tokens, "temperature": 0},
+        )
+        response.raise_for_status()
+        return response.json()["content"]
+
+
+BLOCKED_WORDS = ("fuck", "shit", "bitch", "bastard", "idiot", "asshole")
+_NUMBERED_TEXT = re.compile(r'^\d+\. (".*")$', re.MULTILINE)
+
+
+class RulesProvider:
+    """Deterministic offline model: word-list moderation and a canned reply.
+
+    Understands the three prompt shapes the app sends: a batch of numbered
+    JSON strings (answers a JSON array), an auto-reply prompt ending in
+    ``Reply:`` and a single-text moderation prompt (answers true/false).
+    """
+
+    def __init__(
+        self,
+        blocked_words: Iterable[str] = BLOCKED_WORDS,
+        reply: str = "Thank you for your comment!",
+    ) -> None:
+        self.name = "rules"
+        self.blocked_words = tuple(word.lower() for word in blocked_words)
+        self.reply = reply
+
+    def is_blocked(self, text: str) -> bool:
+        lowered = text.lower()
+        return any(word in lowered for word in self.blocked_words)
+
+    async def generate(self, prompt: str) -> str:
+        batch = _NUMBERED_TEXT.findall(prompt)
+        if batch:
+            return json.dumps([self.is_blocked(json.loads(text)) for text in batch])
+        if prompt.rstrip().endswith("Reply:"):
+            return self.reply
+        text = prompt.rsplit("Text:", 1)[-1]
+        return "true" if self.is_blocked(text) else "false"
+
+
+class HedgedProvider:
+    """Tries providers in order, starting the next one after ``hedge_delay``.
+
+    The first successful answer wins and the slower calls are cancelled. A
+    failure starts the next provider immediately instead of waiting.
+    """
+
+    def __init__(self, providers: list[ModelProvider], hedge_delay: float) -> None:
+        self.providers = providers
+        self.hedge_delay = hedge_delay
+        self.name = "hedged:" + ",".join(p.name for p in providers)
+
+    async def generate(self, prompt: str) -> str:
+        pending: set[asyncio.Task] = set()
+        waiting = list(self.providers)
+        last_error: BaseException | None = None
+        try:
+            while waiting or pending:
+                if waiting:
+                    pending.add(asyncio.create_task(waiting.pop(0).generate(prompt)))
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay if waiting else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error or RuntimeError("No providers configured")
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def build_provider(name: str) -> ModelProvider:
+    if name == "gemini":
+        return MeteredProvider(GeminiProvider())
+    if name == "llamacpp":
+        return MeteredProvider(LlamaCppProvider())
+    if name == "rules":
+        return MeteredProvider(RulesProvider())
+    raise ValueError(f"Unknown model provider: {name}")
+
+
+def provider_for(spec: str, hedge_delay: float = PROVIDER_HEDGE_DELAY) -> ModelProvider:
+    """``"gemini"`` or a hedged list such as ``"llamacpp,gemini"``."""
+    providers = [build_provider(name.strip()) for name in spec.split(",")]
+    if len(providers) == 1:
+        return providers[0]
+    return HedgedProvider(providers, hedge_delay)
+
+
+moderation_provider = provider_for(MODERATION_PROVIDER)
+auto_reply_provider = provider_for(AUTO_REPLY_PROVIDER)
@@ -0,0 +1,27 @@
+"""Add users role email index
+
+Revision ID: 0d0ac79ef79f
+Revises: 9878723b5dc7
+Create Date: 2026-10-19 15:02:11.408133
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0d0ac79ef79f"
+down_revision: Union[str, None] = "9878723b5dc7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_users_role_email", "users", ["role", "email"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_role_email", table_name="users")
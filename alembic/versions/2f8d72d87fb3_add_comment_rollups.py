@@ -0,0 +1,44 @@
+"""Add comment_rollups
+
+Revision ID: 2f8d72d87fb3
+Revises: 0d0ac79ef79f
+Create Date: 2026-10-19 15:41:27.093518
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2f8d72d87fb3"
+down_revision: Union[str, None] = "0d0ac79ef79f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "comment_rollups",
+        sa.Column("dimension", sa.String(), nullable=False),
+        sa.Column("bucket", sa.DateTime(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("blocked_count", sa.Integer(), nullable=False),
+        sa.Column("auto_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("dimension", "bucket"),
+    )
+    op.create_index(
+        "ix_comment_rollups_bucket_dimension",
+        "comment_rollups",
+        ["bucket", "dimension"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_comment_rollups_bucket_dimension", table_name="comment_rollups")
+    op.drop_table("comment_rollups")
@@ -0,0 +1,35 @@
+"""Add deleted_at to poshts
+
+Revision ID: 368cea8b9a5d
+Revises: 1d0fb1d473e5
+Create Date: 2026-10-19 10:12:41.305117
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "368cea8b9a5d"
+down_revision: Union[str, None] = "1d0fb1d473e5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "poshts", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.create_index(
+        op.f("ix_poshts_deleted_at"), "poshts", ["deleted_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_poshts_deleted_at"), table_name="poshts")
+    op.drop_column("poshts", "deleted_at")
@@ -0,0 +1,52 @@
+"""Rebalance indexes
+
+Revision ID: 44086fb196ca
+Revises: 2f8d72d87fb3
+Create Date: 2026-10-19 16:58:40.512907
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "44086fb196ca"
+down_revision: Union[str, None] = "2f8d72d87fb3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Primary keys are already the rowid, and nothing filters or sorts on the text
+# columns, so these only cost writes.
+REDUNDANT = (
+    ("ix_users_id", "users", ["id"]),
+    ("ix_poshts_id", "poshts", ["id"]),
+    ("ix_poshts_title", "poshts", ["title"]),
+    ("ix_poshts_posht_text", "poshts", ["posht_text"]),
+    ("ix_comments_id", "comments", ["id"]),
+    ("ix_comments_comment_text", "comments", ["comment_text"]),
+)
+
+HOT_PATHS = (
+    ("ix_comments_posht_id_created_at", "comments", ["posht_id", "created_at"]),
+    ("ix_comments_user_id", "comments", ["user_id"]),
+    ("ix_comments_created_at", "comments", ["created_at"]),
+    ("ix_poshts_user_id_created_at", "poshts", ["user_id", "created_at"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, _ in REDUNDANT:
+        op.drop_index(name, table_name=table, if_exists=True)
+    for name, table, columns in HOT_PATHS:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in HOT_PATHS:
+        op.drop_index(name, table_name=table, if_exists=True)
+    for name, table, columns in REDUNDANT:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
@@ -0,0 +1,37 @@
+"""Add comment_archive_partitions
+
+Revision ID: 612ee9e73cde
+Revises: 368cea8b9a5d
+Create Date: 2026-10-19 11:02:17.481930
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "612ee9e73cde"
+down_revision: Union[str, None] = "368cea8b9a5d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "comment_archive_partitions",
+        sa.Column("month", sa.String(length=6), nullable=False),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("min_id", sa.Integer(), nullable=False),
+        sa.Column("max_id", sa.Integer(), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("month"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("comment_archive_partitions")
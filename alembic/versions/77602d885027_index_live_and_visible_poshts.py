@@ -0,0 +1,56 @@
+"""Index live and visible poshts
+
+Revision ID: 77602d885027
+Revises: 7a8a1147acd5
+Create Date: 2026-10-19 20:31:07.642815
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "77602d885027"
+down_revision: Union[str, None] = "7a8a1147acd5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The feed backfill now asks for is_blocked = 0, which NULL never matches.
+    op.execute("UPDATE poshts SET is_blocked = 0 WHERE is_blocked IS NULL")
+    op.drop_index("ix_poshts_deleted_at", table_name="poshts")
+    op.create_index(
+        "ix_poshts_deleted_at",
+        "poshts",
+        ["deleted_at"],
+        unique=False,
+        sqlite_where=sa.text("deleted_at IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_poshts_live_created_at",
+        "poshts",
+        ["created_at", "id"],
+        unique=False,
+        sqlite_where=sa.text("deleted_at IS NULL"),
+    )
+    op.create_index(
+        "ix_poshts_visible_created_at",
+        "poshts",
+        ["created_at"],
+        unique=False,
+        sqlite_where=sa.text("deleted_at IS NULL AND is_blocked = 0"),
+    )
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_poshts_visible_created_at", table_name="poshts")
+    op.drop_index("ix_poshts_live_created_at", table_name="poshts")
+    op.drop_index("ix_poshts_deleted_at", table_name="poshts")
+    op.create_index("ix_poshts_deleted_at", "poshts", ["deleted_at"], unique=False)
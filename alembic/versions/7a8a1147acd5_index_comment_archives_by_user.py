@@ -0,0 +1,38 @@
+"""Index comment archive partitions by user
+
+Revision ID: 7a8a1147acd5
+Revises: 8bf0964adfc2
+Create Date: 2026-10-19 19:40:52.906114
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7a8a1147acd5"
+down_revision: Union[str, None] = "8bf0964adfc2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _partition_tables() -> list[str]:
+    result = op.get_bind().execute(
+        sa.text("SELECT table_name FROM comment_archive_partitions")
+    )
+    return [row[0] for row in result]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in _partition_tables():
+        op.create_index(f"ix_{table}_user_id", table, ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in _partition_tables():
+        op.drop_index(f"ix_{table}_user_id", table_name=table)
@@ -0,0 +1,48 @@
+"""Add version to comment archive partitions
+
+Revision ID: 8bf0964adfc2
+Revises: 4a132dd7e0ad
+Create Date: 2026-10-19 19:12:05.318427
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8bf0964adfc2"
+down_revision: Union[str, None] = "4a132dd7e0ad"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _partition_tables() -> list[str]:
+    result = op.get_bind().execute(
+        sa.text("SELECT table_name FROM comment_archive_partitions")
+    )
+    return [row[0] for row in result]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in _partition_tables():
+        op.add_column(
+            table,
+            sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+        )
+        # Archiving dropped the version; every edit left a revision behind.
+        op.execute(
+            f"UPDATE {table} SET version = COALESCE("
+            "(SELECT MAX(revisions.version) + 1 FROM revisions"
+            " WHERE revisions.target = 'comment'"
+            f" AND revisions.target_id = {table}.id), 1)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in _partition_tables():
+        op.drop_column(table, "version")
@@ -0,0 +1,62 @@
+"""Add versions and revisions
+
+Revision ID: a3ff5a3b63df
+Revises: 44086fb196ca
+Create Date: 2026-10-19 17:24:51.730264
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3ff5a3b63df"
+down_revision: Union[str, None] = "44086fb196ca"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ("poshts", "comments"):
+        op.add_column(
+            table,
+            sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+        )
+    op.create_table(
+        "revisions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("target", sa.String(), nullable=False),
+        sa.Column("target_id", sa.Integer(), nullable=False),
+        sa.Column("posht_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=15), nullable=True),
+        sa.Column("text", sa.String(length=1024), nullable=False),
+        sa.Column("is_blocked", sa.Boolean(), nullable=True),
+        sa.Column(
+            "replaced_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_revisions_target_target_id_version",
+        "revisions",
+        ["target", "target_id", "version"],
+        unique=True,
+    )
+    op.create_index("ix_revisions_posht_id", "revisions", ["posht_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_revisions_posht_id", table_name="revisions")
+    op.drop_index("ix_revisions_target_target_id_version", table_name="revisions")
+    op.drop_table("revisions")
+    for table in ("comments", "poshts"):
+        op.drop_column(table, "version")
@@ -0,0 +1,49 @@
+"""Add posht_scores
+
+Revision ID: c54c8bfe3649
+Revises: 612ee9e73cde
+Create Date: 2026-10-19 12:20:05.917342
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c54c8bfe3649"
+down_revision: Union[str, None] = "612ee9e73cde"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "posht_scores",
+        sa.Column("posht_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("base", sa.Float(), nullable=False),
+        sa.Column("comment_count", sa.Integer(), nullable=False),
+        sa.Column("blocked_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["posht_id"],
+            ["poshts.id"],
+        ),
+        sa.PrimaryKeyConstraint("posht_id"),
+    )
+    op.create_index(
+        "ix_posht_scores_score_posht_id",
+        "posht_scores",
+        ["score", "posht_id"],
+        unique=False,
+    )
+    # Scores for existing poshts are filled in by feed.backfill_scores on startup.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_posht_scores_score_posht_id", table_name="posht_scores")
+    op.drop_table("posht_scores")
@@ -0,0 +1,176 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    delete,
+    func,
+    insert,
+    select,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import COMMENT_ARCHIVE_AFTER_DAYS, COMMENT_ARCHIVE_INTERVAL
+from database import SessionLocal
+from loguru import logger
+from models import Comment, CommentArchivePartition
+
+logger.add("loguru/archive.log")
+
+ARCHIVE_COLUMNS = (
+    "id",
+    "comment_text",
+    "created_at",
+    "posht_id",
+    "user_id",
+    "is_blocked",
+    "auto_created",
+    "version",
+)
+
+archive_metadata = MetaData()
+
+
+def partition_table(month: str) -> Table:
+    """Monthly cold partition ``comments_YYYYMM`` with the comments columns."""
+    name = f"comments_{month}"
+    if name in archive_metadata.tables:
+        return archive_metadata.tables[name]
+    return Table(
+        name,
+        archive_metadata,
+        Column("id", Integer, primary_key=True),
+        Column("comment_text", String(1024), nullable=False),
+        Column("created_at", DateTime(timezone=True)),
+        Column("posht_id", Integer, nullable=False),
+        Column("user_id", Integer, nullable=False),
+        Column("is_blocked", Boolean, default=False),
+        Column("auto_created", Boolean, default=False),
+        Column("version", Integer, nullable=False, default=1, server_default="1"),
+        Index(f"ix_{name}_posht_id_created_at", "posht_id", "created_at"),
+        Index(f"ix_{name}_user_id", "user_id"),
+    )
+
+
+async def archived_partitions(
+    db: AsyncSession, comment_id: int | None = None
+) -> list[Table]:
+    query = select(CommentArchivePartition.month).order_by(
+        CommentArchivePartition.month
+    )
+    if comment_id is not None:
+        query = query.where(
+            CommentArchivePartition.min_id <= comment_id,
+            CommentArchivePartition.max_id >= comment_id,
+        )
+    result = await db.execute(query)
+    return [partition_table(month) for month in result.scalars().all()]
+
+
+async def register_partition(
+    db: AsyncSession, month: str, table_name: str, rows: list[dict[str, Any]]
+) -> None:
+    """Record rows just copied into a partition in its id range and row count."""
+    ids = [row["id"] for row in rows]
+    partition = CommentArchivePartition.__table__
+    stmt = sqlite_insert(partition).values(
+        month=month,
+        table_name=table_name,
+        min_id=min(ids),
+        max_id=max(ids),
+        row_count=len(ids),
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[partition.c.month],
+            set_={
+                "min_id": func.min(partition.c.min_id, stmt.excluded.min_id),
+                "max_id": func.max(partition.c.max_id, stmt.excluded.max_id),
+                "row_count": partition.c.row_count + stmt.excluded.row_count,
+            },
+        )
+    )
+
+
+class CommentArchiver:
+    """Moves comments older than ``older_than_days`` into monthly partitions.
+
+    Each chunk is copied and deleted in one short transaction, so a crash
+    never leaves a comment in both places or in neither.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        older_than_days: int = COMMENT_ARCHIVE_AFTER_DAYS,
+        interval: float = COMMENT_ARCHIVE_INTERVAL,
+        chunk_size: int = 1000,
+        pause: float = 0.01,
+    ) -> None:
+        self.session_factory = session_factory
+        self.older_than_days = older_than_days
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.pause = pause
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await self.archive_once()
+            except Exception as e:
+                logger.exception(f"Comment archival failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def archive_once(self, now: datetime | None = None) -> int:
+        cutoff = (now or datetime.now()) - timedelta(days=self.older_than_days)
+        archived = 0
+        while True:
+            async with self.session_factory() as db:
+                moved = await self._archive_chunk(db, cutoff)
+                await db.commit()
+            archived += moved
+            if moved < self.chunk_size:
+                break
+            await asyncio.sleep(self.pause)
+        if archived:
+            logger.info(f"Archived {archived} comments older than {cutoff}")
+        return archived
+
+    async def _archive_chunk(self, db: AsyncSession, cutoff: datetime) -> int:
+        result = await db.execute(
+            select(*(getattr(Comment, name) for name in ARCHIVE_COLUMNS))
+            .where(Comment.created_at < cutoff)
+            .order_by(Comment.id)
+            .limit(self.chunk_size)
+        )
+        rows = [dict(row._mapping) for row in result.all()]
+        if not rows:
+            return 0
+
+        by_month: dict[str, list[dict[str, Any]]] = {}
+        for row in rows:
+            by_month.setdefault(row["created_at"].strftime("%Y%m"), []).append(row)
+
+        for month, month_rows in by_month.items():
+            table = partition_table(month)
+            await db.run_sync(
+                lambda session: table.create(session.connection(), checkfirst=True)
+            )
+            await db.execute(insert(table), month_rows)
+            await register_partition(db, month, table.name, month_rows)
+
+        ids = [row["id"] for row in rows]
+        await db.execute(delete(Comment).where(Comment.id.in_(ids)))
+        return len(rows)
+
+
+comment_archiver = CommentArchiver(SessionLocal)
@@ -0,0 +1,156 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Coroutine
+
+from loguru import logger
+from task_supervisor import TaskRejected, TaskSupervisor, task_supervisor
+
+logger.add("loguru/auto_replies.log")
+
+
+class AutoReplyScheduler:
+    """One debounced auto-reply per posht instead of one per comment.
+
+    The first comment on a posht opens a window as long as the author's
+    ``auto_comment_delay``; every comment arriving before it closes joins the
+    same batch. When the window closes, the ``top_k`` most recent comments go
+    to ``reply`` in a single call. At most ``max_per_hour`` replies are
+    written per posht, so tasks and model calls scale with active poshts
+    rather than with comments. An open window is only a timer; the
+    supervisor's ``group`` bounds the delay lookups and reply calls, so its
+    limit caps concurrent model calls rather than open windows.
+    """
+
+    def __init__(
+        self,
+        load_delay: Callable[[int], Awaitable[float | None]],
+        reply: Callable[[int, list[str]], Awaitable[None]],
+        top_k: int = 3,
+        max_per_hour: int = 6,
+        clock: Callable[[], float] = time.monotonic,
+        supervisor: TaskSupervisor = task_supervisor,
+        group: str = "auto_replies",
+    ) -> None:
+        self.load_delay = load_delay
+        self.reply = reply
+        self.top_k = top_k
+        self.max_per_hour = max_per_hour
+        self.clock = clock
+        self.supervisor = supervisor
+        self.group = group
+        self._pending: dict[int, list[str]] = {}
+        self._sent: dict[int, deque[float]] = {}
+        self._windows: dict[int, asyncio.TimerHandle] = {}
+        self._swept_at = clock()
+        self.comments = 0
+        self.replies = 0
+        self.capped = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "comments": self.comments,
+            "replies": self.replies,
+            "capped": self.capped,
+            "pending_poshts": len(self._pending),
+            "open_windows": len(self._windows),
+            "tasks": len(self.supervisor.groups[self.group].tasks),
+        }
+
+    def schedule(self, posht_id: int, comment_text: str) -> None:
+        self.comments += 1
+        if posht_id in self._pending:
+            self._pending[posht_id].append(comment_text)
+            return
+        if not self._spawn(posht_id, self._open(posht_id)):
+            return
+        self._pending[posht_id] = [comment_text]
+
+    def _spawn(self, posht_id: int, coro: Coroutine[Any, Any, None]) -> bool:
+        try:
+            task = self.supervisor.spawn(
+                self.group, coro, name=f"auto-reply-{posht_id}"
+            )
+        except TaskRejected as e:
+            logger.warning(f"Auto-reply for posht {posht_id} dropped: {e}")
+            return False
+        # A task cancelled before it starts never reaches its own finally.
+        task.add_done_callback(
+            lambda task: task.cancelled() and self._pending.pop(posht_id, None)
+        )
+        return True
+
+    async def _open(self, posht_id: int) -> None:
+        opened = False
+        try:
+            delay = await self.load_delay(posht_id)
+            if delay is not None:
+                self._windows[posht_id] = asyncio.get_running_loop().call_later(
+                    delay, self._close, posht_id
+                )
+                opened = True
+        except Exception as e:
+            logger.exception(f"Auto-reply for posht {posht_id} failed: {e}")
+        finally:
+            if not opened:
+                self._pending.pop(posht_id, None)
+
+    def _close(self, posht_id: int) -> None:
+        self._windows.pop(posht_id, None)
+        if not self._spawn(posht_id, self._run(posht_id)):
+            self._pending.pop(posht_id, None)
+
+    async def _run(self, posht_id: int) -> None:
+        comments = self._pending.pop(posht_id, None)
+        if comments is None:
+            return
+        try:
+            if not self._allow(posht_id):
+                self.capped += 1
+                logger.info(f"Auto-reply cap reached for posht {posht_id}")
+                return
+            await self.reply(posht_id, comments[-self.top_k :])
+            self.replies += 1
+        except Exception as e:
+            logger.exception(f"Auto-reply for posht {posht_id} failed: {e}")
+
+    def _allow(self, posht_id: int) -> bool:
+        now = self.clock()
+        if now - self._swept_at >= 3600:
+            self._sweep(now)
+        sent = self._sent.setdefault(posht_id, deque())
+        while sent and sent[0] <= now - 3600:
+            sent.popleft()
+        if len(sent) >= self.max_per_hour:
+            return False
+        sent.append(now)
+        return True
+
+    def _sweep(self, now: float) -> None:
+        """Forget poshts with no reply in the last hour."""
+        self._swept_at = now
+        stale = [
+            posht_id
+            for posht_id, sent in self._sent.items()
+            if not sent or sent[-1] <= now - 3600
+        ]
+        for posht_id in stale:
+            del self._sent[posht_id]
+
+    async def drain(self) -> None:
+        """Wait for every open window to close and be answered; used by tests."""
+        loop = asyncio.get_running_loop()
+        while self._windows or self.supervisor.groups[self.group].tasks:
+            await self.supervisor.drain(self.group)
+            if self._windows:
+                closes = max(window.when() for window in self._windows.values())
+                await asyncio.sleep(max(0.0, closes - loop.time()))
+
+    def clear(self) -> None:
+        for window in self._windows.values():
+            window.cancel()
+        self._windows.clear()
+        self.supervisor.cancel(self.group)
+        self._pending.clear()
+        self._sent.clear()
@@ -0,0 +1,93 @@
+"""Comment inserts per second under concurrency for each write mode.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_comment_writes
+"""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import crud
+from group_commit import GroupCommitWriter
+from models import Base, Comment, Posht, User
+
+CONCURRENCY = (1, 10, 100)
+INSERTS_PER_WORKER = 20
+
+
+async def commit_refresh(sessions: async_sessionmaker, values: dict) -> None:
+    async with sessions() as db:
+        comment = Comment(**values)
+        db.add(comment)
+        await db.commit()
+        await db.refresh(comment)
+
+
+async def returning(sessions: async_sessionmaker, values: dict) -> None:
+    async with sessions() as db:
+        await db.scalar(insert(Comment).values(**values).returning(Comment))
+        await db.commit()
+
+
+async def group_commit(writer: GroupCommitWriter, values: dict) -> None:
+    await writer.submit(lambda db: crud._insert_comment(db, values))
+
+
+async def run(mode, target, workers: int) -> float:
+    async def worker(n: int) -> None:
+        for i in range(INSERTS_PER_WORKER):
+            values = {
+                "comment_text": f"comment {n}-{i}",
+                "posht_id": 1,
+                "user_id": 1,
+                "is_blocked": False,
+            }
+            await mode(target, values)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(workers)))
+    return workers * INSERTS_PER_WORKER / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}",
+            pool_size=100,
+            connect_args={"timeout": 30},
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        async with sessions() as db:
+            db.add(User(id=1, email="writer@example.com", hashed_password="x"))
+            db.add(Posht(id=1, title="t", posht_text="x", user_id=1))
+            await db.commit()
+
+        writer = GroupCommitWriter(sessions)
+        print(f"{'workers':>7} {'commit+refresh':>15} {'returning':>10} {'group':>8}")
+        for workers in CONCURRENCY:
+            rates = [
+                await run(commit_refresh, sessions, workers),
+                await run(returning, sessions, workers),
+                await run(group_commit, writer, workers),
+            ]
+            print(
+                f"{workers:>7} "
+                + " ".join(f"{r:>{w}.0f}" for r, w in zip(rates, (15, 10, 8)))
+            )
+
+        await writer.close()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""Payload size and encode time of the list encodings on 10k comment rows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_payloads
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+import orjson
+
+from compression import compress
+from serialization import COMMENT_READ_FIELDS, MsgPackResponse, rows_to_columns
+
+ROWS = 10_000
+ROUNDS = 5
+
+
+def make_rows() -> list[dict[str, Any]]:
+    started = datetime(2025, 1, 1)
+    return [
+        {
+            "id": i,
+            "comment_text": f"comment number {i} on a busy thread",
+            "created_at": started + timedelta(seconds=i),
+            "posht_id": i // 200 + 1,
+            "user_id": i % 500 + 1,
+            "is_blocked": i % 11 == 0,
+        }
+        for i in range(ROWS)
+    ]
+
+
+def best_of(fn: Callable[[], bytes]) -> tuple[float, bytes]:
+    best = float("inf")
+    payload = b""
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        payload = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, payload
+
+
+def main() -> None:
+    rows = make_rows()
+    encoders: dict[str, Callable[[], bytes]] = {
+        "json": lambda: orjson.dumps(rows),
+        "columnar json": lambda: orjson.dumps(
+            rows_to_columns(COMMENT_READ_FIELDS, rows)
+        ),
+        "msgpack": lambda: MsgPackResponse(rows).body,
+    }
+
+    print(f"{ROWS} rows, best of {ROUNDS}")
+    print(f"  {'encoding':<14} {'ms':>7} {'bytes':>9} {'gzip':>8} {'br':>8}")
+    for name, encode in encoders.items():
+        seconds, payload = best_of(encode)
+        gzipped = len(compress(payload, "gzip"))
+        brotli = len(compress(payload, "br"))
+        print(
+            f"  {name:<14} {seconds * 1000:7.1f} {len(payload):9} "
+            f"{gzipped:8} {brotli:8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare the old ORM + Pydantic + json path with the orjson row path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serialization
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from crud import read_poshts
+from models import Base, Posht, User
+from schemas import PoshtRead
+
+ROWS = 10_000
+ROUNDS = 5
+
+
+async def seed(session: AsyncSession) -> None:
+    session.add(User(id=1, email="bench@example.com", hashed_password="x"))
+    await session.flush()
+    await session.execute(
+        insert(Posht),
+        [
+            {
+                "title": f"title {i}",
+                "posht_text": f"posht text number {i} " * 4,
+                "user_id": 1,
+                "created_at": datetime(2025, 1, 1),
+                "is_blocked": i % 7 == 0,
+            }
+            for i in range(ROWS)
+        ],
+    )
+    await session.commit()
+
+
+async def orm_pydantic_json(session: AsyncSession) -> bytes:
+    result = await session.execute(select(Posht))
+    poshts = result.scalars().all()
+    validated = TypeAdapter(List[PoshtRead]).validate_python(poshts)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+async def rows_orjson(session: AsyncSession) -> bytes:
+    return orjson.dumps(await read_poshts(session))
+
+
+async def measure(
+    session: AsyncSession, fn: Callable[[AsyncSession], Any]
+) -> tuple[float, int]:
+    best = float("inf")
+    size = 0
+    for _ in range(ROUNDS):
+        session.expunge_all()
+        started = time.perf_counter()
+        payload = await fn(session)
+        best = min(best, time.perf_counter() - started)
+        size = len(payload)
+    return best, size
+
+
+async def main() -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        await seed(session)
+        before, before_size = await measure(session, orm_pydantic_json)
+        after, after_size = await measure(session, rows_orjson)
+
+    await engine.dispose()
+    print(f"{ROWS} rows, best of {ROUNDS}")
+    print(f"  ORM + Pydantic + json: {before * 1000:8.1f} ms  {before_size} bytes")
+    print(f"  rows + orjson:         {after * 1000:8.1f} ms  {after_size} bytes")
+    print(f"  speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""Thundering herd on GET /poshts/{id}: N concurrent reads of one post.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_thundering_herd
+"""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import crud
+from models import Base, Posht, User
+from singleflight import SingleFlight
+
+CONCURRENCY = (10, 100, 1000)
+
+
+async def herd(
+    sessions: async_sessionmaker,
+    n: int,
+    read: Callable[[AsyncSession], Awaitable[object]],
+) -> float:
+    async def one() -> None:
+        async with sessions() as session:
+            await read(session)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    return time.perf_counter() - started
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as session:
+            session.add(User(id=1, email="herd@example.com", hashed_password="x"))
+            session.add(Posht(id=1, title="viral", posht_text="hot", user_id=1))
+            await session.commit()
+
+        print(f"{'requests':>8} {'direct ms':>10} {'coalesced ms':>13} {'db loads':>9}")
+        for n in CONCURRENCY:
+            direct = await herd(sessions, n, lambda s: crud._load_posht(1, s))
+
+            crud.posht_reads = SingleFlight(ttl=0)
+            coalesced = await herd(sessions, n, lambda s: crud.get_posht(1, s))
+            loads = crud.posht_reads.stats["executions"]
+
+            print(f"{n:>8} {direct * 1000:>10.1f} {coalesced * 1000:>13.1f} {loads:>9}")
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
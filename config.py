@@ -6,5 +6,113 @@ load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
-PROMPT_FOR_AUTO_REPLY = os.getenv("PROMPT_FOR_AUTO_REPLY")
-PROMPT_FOR_PROFANITY = os.getenv("PROMPT_FOR_PROFANITY")
+PROMPT_FOR_AUTO_REPLY = os.getenv(
+    "PROMPT_FOR_AUTO_REPLY",
+    "You are an assistant helping to reply to a comment on a social media post.\n"
+    "The reply should be friendly, concise, and relevant to both the post and "
+    "the comment.\n"
+    "Avoid profanity. Only return the generated reply without any explanation.\n\n"
+    "Post: {post_text}\n"
+    "Comment: {comment_text}\n"
+    "Reply:",
+)
+PROMPT_FOR_PROFANITY = os.getenv(
+    "PROMPT_FOR_PROFANITY",
+    "You are an AI content moderator.\n"
+    "Check if the following text contains profanity, insults, hate speech, or "
+    "inappropriate language.\n"
+    "Respond ONLY with one word: 'true' if it should be blocked, 'false' if it "
+    "is acceptable.\n\n"
+    "Text: {text}",
+)
+PROMPT_FOR_PROFANITY_BATCH = os.getenv(
+    "PROMPT_FOR_PROFANITY_BATCH",
+    "You are an AI content moderator.\n"
+    "For each numbered text below, check if it contains profanity, insults, "
+    "hate speech, or inappropriate language.\n"
+    "Respond ONLY with a JSON array of booleans, one per text and in order: "
+    "true if it should be blocked, false if it is acceptable.\n\n",
+)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "./rate_limits.db")
+
+POSHT_CACHE_TTL = float(os.getenv("POSHT_CACHE_TTL", "0.3"))
+
+PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", "500"))
+PURGE_INTERVAL = float(os.getenv("PURGE_INTERVAL", "60"))
+
+COMMENT_ARCHIVE_AFTER_DAYS = int(os.getenv("COMMENT_ARCHIVE_AFTER_DAYS", "90"))
+COMMENT_ARCHIVE_INTERVAL = float(os.getenv("COMMENT_ARCHIVE_INTERVAL", "3600"))
+
+FEED_DECAY_SECONDS = float(os.getenv("FEED_DECAY_SECONDS", "45000"))
+FEED_BLOCKED_PENALTY = float(os.getenv("FEED_BLOCKED_PENALTY", "2.0"))
+
+GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "false").lower() == "true"
+GROUP_COMMIT_DELAY_MS = float(os.getenv("GROUP_COMMIT_DELAY_MS", "5"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "256"))
+
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "100000"))
+
+NEAR_DUP_WINDOW = float(os.getenv("NEAR_DUP_WINDOW", "3600"))
+NEAR_DUP_MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", "3"))
+NEAR_DUP_FLOOD_THRESHOLD = int(os.getenv("NEAR_DUP_FLOOD_THRESHOLD", "5"))
+# Texts with fewer 4-grams than this ("ok", "+1") collide on SimHash.
+NEAR_DUP_MIN_SHINGLES = int(os.getenv("NEAR_DUP_MIN_SHINGLES", "8"))
+NEAR_DUP_MAX_SCAN = int(os.getenv("NEAR_DUP_MAX_SCAN", "256"))
+
+REMODERATION_CHUNK_SIZE = int(os.getenv("REMODERATION_CHUNK_SIZE", "500"))
+REMODERATION_BATCH_SIZE = int(os.getenv("REMODERATION_BATCH_SIZE", "20"))
+REMODERATION_CONCURRENCY = int(os.getenv("REMODERATION_CONCURRENCY", "4"))
+
+MODERATION_PROVIDER = os.getenv("MODERATION_PROVIDER", "gemini")
+AUTO_REPLY_PROVIDER = os.getenv("AUTO_REPLY_PROVIDER", "gemini")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+LLAMACPP_URL = os.getenv("LLAMACPP_URL", "http://127.0.0.1:8080")
+PROVIDER_HEDGE_DELAY = float(os.getenv("PROVIDER_HEDGE_DELAY", "1.5"))
+
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "10"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "true").lower() == "true"
+MODERATION_FAIL_POLICY = os.getenv("MODERATION_FAIL_POLICY", "open")
+
+QUERY_PROFILER_ENABLED = os.getenv("QUERY_PROFILER_ENABLED", "false").lower() == "true"
+QUERY_PROFILER_SLOW_MS = float(os.getenv("QUERY_PROFILER_SLOW_MS", "50"))
+QUERY_PROFILER_MAX_QUERIES = int(os.getenv("QUERY_PROFILER_MAX_QUERIES", "20"))
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+USER_COUNT_EXACT_LIMIT = int(os.getenv("USER_COUNT_EXACT_LIMIT", "1000"))
+
+DATABASE_READ_URLS = [
+    url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()
+]
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Databases for poshts and comments besides the primary, which is shard 0.
+SHARD_URLS = [
+    url.strip() for url in os.getenv("SHARD_URLS", "").split(",") if url.strip()
+]
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+
+AUTO_REPLY_TOP_K = int(os.getenv("AUTO_REPLY_TOP_K", "3"))
+AUTO_REPLY_MAX_PER_HOUR = int(os.getenv("AUTO_REPLY_MAX_PER_HOUR", "6"))
+
+TASK_DRAIN_TIMEOUT = float(os.getenv("TASK_DRAIN_TIMEOUT", "5"))
+AUTO_REPLY_TASK_LIMIT = int(os.getenv("AUTO_REPLY_TASK_LIMIT", "100"))
+AUTO_REPLY_TASK_QUEUE = int(os.getenv("AUTO_REPLY_TASK_QUEUE", "1000"))
+REMODERATION_MAX_JOBS = int(os.getenv("REMODERATION_MAX_JOBS", "2"))
+
+HOT_CACHE_MAX_BYTES = int(os.getenv("HOT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+HOT_CACHE_CHECK_SECONDS = float(os.getenv("HOT_CACHE_CHECK_SECONDS", "1"))
+
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "100"))
+WEBHOOK_INTERVAL = float(os.getenv("WEBHOOK_INTERVAL", "5"))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "32"))
+WEBHOOK_MAX_FAILURES = int(os.getenv("WEBHOOK_MAX_FAILURES", "10"))
+WEBHOOK_MAX_BACKOFF = float(os.getenv("WEBHOOK_MAX_BACKOFF", "300"))
+OUTBOX_RETENTION_DAYS = float(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
@@ -1,42 +1,147 @@
-import asyncio
+import heapq
 from datetime import datetime, timedelta
-from typing import Sequence
+from typing import Any, Callable, Sequence
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
-from sqlalchemy import select
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    Subquery,
+    Table,
+    exists,
+    func,
+    insert,
+    literal,
+    select,
+    union_all,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ai_moderation import check_for_profanity, model
-from config import ALGORITHM, PROMPT_FOR_AUTO_REPLY, SECRET_KEY
-from database import get_db
+from ai_moderation import check_for_profanity, render_prompt
+from archive import archived_partitions
+from auto_replies import AutoReplyScheduler
+from config import (
+    ALGORITHM,
+    AUTO_REPLY_MAX_PER_HOUR,
+    AUTO_REPLY_TOP_K,
+    GROUP_COMMIT_ENABLED,
+    POSHT_CACHE_TTL,
+    PROMPT_FOR_AUTO_REPLY,
+    SECRET_KEY,
+)
+from database import SessionLocal, get_read_db, remember_writer
+from feed import record_comment, track_posht, untrack_posht
+from group_commit import comment_writer, writer_for_shard
+from hot_cache import hot_cache
+from llm_client import auto_reply_client
 from loguru import logger
-from models import Comment, Posht, User
+from models import Comment, Posht, Revision, User
+from near_duplicates import comment_index
+from outbox import record_event
+from purger import posht_purgers
+from rollups import record_rollup
 from schemas import (
     CommentCreate,
+    CommentRead,
     CommentUpdate,
     PoshtCreate,
+    PoshtRead,
     PoshtUpdate,
+    RevisionRead,
     UserCreate,
     UserRead,
 )
 from security import decode_token, hash_password
+from serialization import (
+    COMMENT_DETAIL_FIELDS,
+    COMMENT_READ_FIELDS,
+    POSHT_DETAIL_FIELDS,
+    POSHT_READ_FIELDS,
+    rows_to_dicts,
+)
+from sharding import shard_of, shards
+from singleflight import SingleFlight
 
 logger.add("loguru/crud.log")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+posht_reads = SingleFlight(ttl=POSHT_CACHE_TTL)
+
+
+def posht_is_live() -> ColumnElement[bool]:
+    return Posht.deleted_at.is_(None)
+
+
+def comment_is_live(posht_id: Column = Comment.posht_id) -> ColumnElement[bool]:
+    return ~exists().where(Posht.id == posht_id, Posht.deleted_at.is_not(None))
+
 
-async def read_poshts(db: AsyncSession = Depends(get_db)) -> Sequence[Posht]:
-    result = await db.execute(select(Posht))
-    poshts = result.scalars().all()
-    return poshts
+async def comments_with_archive(
+    db: AsyncSession,
+    fields: Sequence[str],
+    where: Callable[[Table], ColumnElement[bool]] | None = None,
+) -> Subquery:
+    """Live comments from the hot table and every archived monthly partition."""
+    selects = []
+    for table in (Comment.__table__, *await archived_partitions(db)):
+        query = select(*(table.c[name] for name in fields)).where(
+            comment_is_live(table.c.posht_id)
+        )
+        if where is not None:
+            query = query.where(where(table))
+        selects.append(query)
+    return union_all(*selects).subquery("all_comments")
+
+
+def merge_sorted(runs: list[list[Any]]) -> list[Any]:
+    """Merge per-shard rows whose last two columns are (created_at, id).
+
+    A row being moved between shards is on both for a moment; it is listed once.
+    """
+    if len(runs) == 1:
+        return runs[0]
+    merged = []
+    for row in heapq.merge(*runs, key=lambda row: (row[-2], row[-1])):
+        if not merged or merged[-1][-1] != row[-1]:
+            merged.append(row)
+    return merged
+
+
+async def read_poshts(
+    db: AsyncSession, fields: Sequence[str] = POSHT_READ_FIELDS
+) -> list[dict[str, Any]]:
+    query = (
+        select(*(getattr(Posht, name) for name in fields), Posht.created_at, Posht.id)
+        .where(posht_is_live())
+        .order_by(Posht.created_at, Posht.id)
+    )
+
+    async def shard_rows(session: AsyncSession) -> list[Any]:
+        return (await session.execute(query)).all()
+
+    return rows_to_dicts(fields, merge_sorted(await shards.scatter(db, shard_rows)))
 
 
-async def get_posht(posht_id: int, db: AsyncSession) -> Posht | None:
-    result = await db.execute(select(Posht).where(Posht.id == posht_id))
-    posht = result.scalar_one_or_none()
+async def _load_posht(posht_id: int, db: AsyncSession) -> PoshtRead | None:
+    columns = (getattr(Posht, name) for name in POSHT_DETAIL_FIELDS)
+    result = await db.execute(
+        select(*columns).where(Posht.id == posht_id, posht_is_live())
+    )
+    row = result.one_or_none()
+    return PoshtRead.model_validate(row._mapping) if row else None
+
+
+async def get_posht(posht_id: int, db: AsyncSession) -> PoshtRead:
+    posht = await posht_reads.do(
+        posht_id,
+        lambda: shards.find(
+            db, posht_id, lambda session: _load_posht(posht_id, session)
+        ),
+    )
     if not posht:
         raise HTTPException(status_code=404, detail="Posht not found")
     return posht
@@ -45,62 +150,158 @@ async def get_posht(posht_id: int, db: AsyncSession) -> Posht | None:
 async def create_posht(db: AsyncSession, posht: PoshtCreate, user: User) -> Posht:
     logger.info("create_posht is running 2!")
     is_blocked = await check_for_profanity(posht.posht_text)
-    new_posht = Posht(
-        title=posht.title,
-        posht_text=posht.posht_text,
-        user_id=user.id,
-        is_blocked=is_blocked,
-    )
-    db.add(new_posht)
-    await db.commit()
-    await db.refresh(new_posht)
+    shard = await shards.shard_for_user(db, user.id)
+    async with shards.session(db, shard) as shard_db:
+        values = {
+            "title": posht.title,
+            "posht_text": posht.posht_text,
+            "user_id": user.id,
+            "is_blocked": is_blocked,
+        }
+        posht_id = await shards.allocate_id(shard_db, Posht.__table__)
+        if posht_id is not None:
+            values["id"] = posht_id
+        new_posht = await shard_db.scalar(
+            insert(Posht).values(**values).returning(Posht)
+        )
+        if not is_blocked:
+            await track_posht(
+                shard_db, new_posht.id, new_posht.created_at, has_comments=False
+            )
+        await record_event(shard_db, "posht", new_posht, "created")
+        await shard_db.commit()
     return new_posht
 
 
+def check_version(expected: int | None, current: int, kind: str) -> None:
+    if expected is not None and expected != current:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{kind} is at version {current}, not {expected}",
+        )
+
+
+async def version_conflict(db: AsyncSession, kind: str) -> HTTPException:
+    await db.rollback()
+    return HTTPException(
+        status_code=409, detail=f"{kind} was changed by another edit; reload it"
+    )
+
+
+async def _moderate_if_changed(
+    old_text: str, new_text: str, was_blocked: bool | None
+) -> bool:
+    """Re-run moderation only when the text itself changed."""
+    if new_text == old_text:
+        return bool(was_blocked)
+    return await check_for_profanity(new_text)
+
+
 async def update_posht(
     db: AsyncSession, posht_id: int, posht: PoshtUpdate
 ) -> Posht | None:
+    """Compare-and-swap edit: 409 if the posht moved past the version read.
+
+    The replaced content is appended to ``revisions`` on the posht's shard.
+    """
     logger.info("update_posht is running!")
-    is_blocked = await check_for_profanity(posht.posht_text)
-    result = await db.execute(select(Posht).where(Posht.id == posht_id))
-    db_posht = result.scalar_one_or_none()
-    if not db_posht:
+    return await shards.find(
+        db, posht_id, lambda session: _update_posht(session, posht_id, posht)
+    )
+
+
+async def _update_posht(
+    db: AsyncSession, posht_id: int, posht: PoshtUpdate
+) -> Posht | None:
+    result = await db.execute(
+        select(Posht.title, Posht.posht_text, Posht.is_blocked, Posht.version).where(
+            Posht.id == posht_id, posht_is_live()
+        )
+    )
+    current = result.one_or_none()
+    # End the read transaction so the model call does not hold a snapshot.
+    await db.commit()
+    if current is None:
         return None
+    check_version(posht.version, current.version, "Posht")
 
-    db_posht.title = posht.title
-    db_posht.posht_text = posht.posht_text
-    db_posht.is_blocked = is_blocked
+    is_blocked = await _moderate_if_changed(
+        current.posht_text, posht.posht_text, current.is_blocked
+    )
+    db_posht = await db.scalar(
+        update(Posht)
+        .where(Posht.id == posht_id, Posht.version == current.version, posht_is_live())
+        .values(
+            title=posht.title,
+            posht_text=posht.posht_text,
+            is_blocked=is_blocked,
+            version=Posht.version + 1,
+        )
+        .returning(Posht)
+    )
+    if not db_posht:
+        raise await version_conflict(db, "Posht")
+    await db.execute(
+        insert(Revision).values(
+            target="posht",
+            target_id=posht_id,
+            posht_id=posht_id,
+            version=current.version,
+            title=current.title,
+            text=current.posht_text,
+            is_blocked=current.is_blocked,
+        )
+    )
+
+    if is_blocked:
+        await untrack_posht(db, posht_id)
+    else:
+        await track_posht(db, posht_id, db_posht.created_at)
+    await record_event(db, "posht", db_posht, "updated")
     await db.commit()
-    await db.refresh(db_posht)
+    posht_reads.forget(posht_id)
     return db_posht
 
 
-async def delete_posht(db: AsyncSession, posht_id: int) -> Posht | None:
-    result = await db.execute(select(Posht).where(Posht.id == posht_id))
-    db_posht = result.scalar_one_or_none()
-    if not db_posht:
-        return None
-    await db.delete(db_posht)
+async def delete_posht(db: AsyncSession, posht_id: int) -> PoshtRead | None:
+    """Soft-delete a posht; its shard's purger removes it and its comments later."""
+    return await shards.find(
+        db, posht_id, lambda session: _delete_posht(session, posht_id)
+    )
+
+
+async def _delete_posht(db: AsyncSession, posht_id: int) -> PoshtRead | None:
+    result = await db.execute(
+        update(Posht)
+        .where(Posht.id == posht_id, posht_is_live())
+        .values(deleted_at=func.now())
+        .returning(*(getattr(Posht, name) for name in POSHT_DETAIL_FIELDS))
+    )
+    row = result.one_or_none()
+    if row:
+        await untrack_posht(db, posht_id)
+        await record_event(db, "posht", row, "deleted")
     await db.commit()
-    return db_posht
+    if not row:
+        return None
+    posht_reads.forget(posht_id)
+    purger = posht_purgers.get(shard_of(db))
+    if purger is not None:
+        purger.wake()
+    return PoshtRead.model_validate(row._mapping)
 
 
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
     hashed = hash_password(user.password)
-    db_user = User(email=user.email, hashed_password=hashed, role=user.role)
-    db.add(db_user)
+    db_user = await db.scalar(
+        insert(User)
+        .values(email=user.email, hashed_password=hashed, role=user.role)
+        .returning(User)
+    )
     await db.commit()
-    await db.refresh(db_user)
     return db_user
 
 
-async def get_users_from_db(db: AsyncSession = Depends(get_db)) -> Sequence[User]:
-    logger.info("get_users_from_db is running!")
-    result = await db.execute(select(User))
-    users = result.scalars().all()
-    return users
-
-
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     logger.info("get_current_user_by_email is running!")
     result = await db.execute(select(User).where(User.email == email))
@@ -119,7 +320,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
 
 
 async def get_current_user_by_id(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_read_db)
 ) -> UserRead:
     payload = decode_token(token)
     logger.info("get_current_user_by_id is running!")
@@ -133,11 +334,10 @@ async def get_current_user_by_id(
     if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    db_user = result.scalar_one_or_none()
-    if not db_user:
+    user = await hot_cache.get(db, User, int(user_id))
+    if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return UserRead.from_orm(db_user)
+    return UserRead.model_validate(user)
 
 
 async def require_admin(
@@ -148,96 +348,329 @@ async def require_admin(
     return current_user
 
 
-async def read_comments(db: AsyncSession = Depends(get_db)) -> list[Comment]:
-    result = await db.execute(select(Comment))
-    comments = result.scalars().all()
-    return comments
+async def read_comments(
+    db: AsyncSession, fields: Sequence[str] = COMMENT_READ_FIELDS
+) -> list[dict[str, Any]]:
+    query = (
+        select(
+            *(getattr(Comment, name) for name in fields),
+            Comment.created_at,
+            Comment.id,
+        )
+        .where(comment_is_live())
+        .order_by(Comment.created_at, Comment.id)
+    )
+
+    async def shard_rows(session: AsyncSession) -> list[Any]:
+        return (await session.execute(query)).all()
+
+    return rows_to_dicts(fields, merge_sorted(await shards.scatter(db, shard_rows)))
 
 
 async def update_comment(
     db: AsyncSession, comment_id: int, comment: CommentUpdate
-) -> Comment:
-    is_blocked = await check_for_profanity(comment.comment_text)
-    result = await db.execute(select(Comment).where(Comment.id == comment_id))
-    db_comment = result.scalar_one_or_none()
-    if not db_comment:
+) -> Comment | None:
+    """Compare-and-swap edit, like ``update_posht``."""
+    return await shards.find(
+        db, comment_id, lambda session: _update_comment(session, comment_id, comment)
+    )
+
+
+async def _update_comment(
+    db: AsyncSession, comment_id: int, comment: CommentUpdate
+) -> Comment | None:
+    result = await db.execute(
+        select(Comment.comment_text, Comment.is_blocked, Comment.version).where(
+            Comment.id == comment_id, comment_is_live()
+        )
+    )
+    current = result.one_or_none()
+    await db.commit()
+    if current is None:
         return None
+    check_version(comment.version, current.version, "Comment")
 
-    db_comment.comment_text = comment.comment_text
-    db_comment.is_blocked = is_blocked
+    is_blocked = await _moderate_if_changed(
+        current.comment_text, comment.comment_text, current.is_blocked
+    )
+    db_comment = await db.scalar(
+        update(Comment)
+        .where(
+            Comment.id == comment_id,
+            Comment.version == current.version,
+            comment_is_live(),
+        )
+        .values(
+            comment_text=comment.comment_text,
+            is_blocked=is_blocked,
+            version=Comment.version + 1,
+        )
+        .returning(Comment)
+    )
+    if not db_comment:
+        raise await version_conflict(db, "Comment")
+    await db.execute(
+        insert(Revision).values(
+            target="comment",
+            target_id=comment_id,
+            posht_id=db_comment.posht_id,
+            version=current.version,
+            text=current.comment_text,
+            is_blocked=current.is_blocked,
+        )
+    )
+
+    if bool(current.is_blocked) != is_blocked:
+        blocked = 1 if is_blocked else -1
+        await record_comment(db, db_comment.posht_id, comments=0, blocked=blocked)
+        await record_rollup(
+            db,
+            db_comment.created_at,
+            db_comment.posht_id,
+            db_comment.user_id,
+            count=0,
+            blocked=blocked,
+        )
+    await record_event(db, "comment", db_comment, "updated")
     await db.commit()
-    await db.refresh(db_comment)
     return db_comment
 
 
+async def read_revisions(
+    db: AsyncSession, target: str, target_id: int
+) -> list[RevisionRead]:
+    """Revisions live with their posht, so they are all on one shard."""
+
+    async def shard_revisions(session: AsyncSession) -> list[RevisionRead] | None:
+        result = await session.execute(
+            select(Revision)
+            .where(Revision.target == target, Revision.target_id == target_id)
+            .order_by(Revision.version)
+        )
+        return [RevisionRead.model_validate(row) for row in result.scalars()] or None
+
+    return await shards.find(db, target_id, shard_revisions) or []
+
+
 async def delete_comment(db: AsyncSession, comment_id: int) -> Comment | None:
+    return await shards.find(
+        db, comment_id, lambda session: _delete_comment(session, comment_id)
+    )
+
+
+async def _delete_comment(db: AsyncSession, comment_id: int) -> Comment | None:
     result = await db.execute(select(Comment).where(Comment.id == comment_id))
     db_comment = result.scalar_one_or_none()
     if not db_comment:
         return None
+    if not db_comment.auto_created:
+        await record_comment(
+            db, db_comment.posht_id, comments=-1, blocked=-int(db_comment.is_blocked)
+        )
+    await record_rollup(
+        db,
+        db_comment.created_at,
+        db_comment.posht_id,
+        db_comment.user_id,
+        count=-1,
+        blocked=-int(bool(db_comment.is_blocked)),
+        auto=-int(bool(db_comment.auto_created)),
+    )
+    # Revisions are append-only: the deleted text becomes the last one.
+    await db.execute(
+        insert(Revision).values(
+            target="comment",
+            target_id=comment_id,
+            posht_id=db_comment.posht_id,
+            version=db_comment.version,
+            text=db_comment.comment_text,
+            is_blocked=db_comment.is_blocked,
+        )
+    )
+    await record_event(db, "comment", db_comment, "deleted")
     await db.delete(db_comment)
     await db.commit()
     return db_comment
 
 
-async def get_comment(comment_id: int, db: AsyncSession) -> Comment:
-    result = await db.execute(select(Comment).where(Comment.id == comment_id))
-    comment = result.scalar_one_or_none()
+async def get_comment(comment_id: int, db: AsyncSession) -> Comment | CommentRead:
+    comment = await shards.find(
+        db, comment_id, lambda session: _load_comment(comment_id, session)
+    )
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     return comment
 
 
-async def create_comment(db: AsyncSession, comment: CommentCreate) -> Comment:
-    is_blocked = await check_for_profanity(comment.comment_text)
-    new_comment = Comment(**comment.dict(), is_blocked=is_blocked)
-    db.add(new_comment)
-    await db.commit()
-    await db.refresh(new_comment)
+async def _load_comment(
+    comment_id: int, db: AsyncSession
+) -> Comment | CommentRead | None:
+    result = await db.execute(
+        select(Comment).where(Comment.id == comment_id, comment_is_live())
+    )
+    return result.scalar_one_or_none() or await _get_archived_comment(comment_id, db)
+
 
-    if not is_blocked:
-        logger.info(
-            "asyncio.create_task(create_auto_reply(db, new_comment)) is running!"
+async def _get_archived_comment(
+    comment_id: int, db: AsyncSession
+) -> CommentRead | None:
+    for table in await archived_partitions(db, comment_id):
+        result = await db.execute(
+            select(*(table.c[name] for name in COMMENT_DETAIL_FIELDS)).where(
+                table.c.id == comment_id, comment_is_live(table.c.posht_id)
+            )
         )
-        asyncio.create_task(create_auto_reply(db, new_comment))
+        row = result.one_or_none()
+        if row:
+            return CommentRead.model_validate(row._mapping)
+    return None
 
+
+async def read_thread(db: AsyncSession, posht_id: int) -> list[dict[str, Any]]:
+    shard = await shards.locate(db, Posht.__table__, posht_id)
+    async with shards.session(db, shard) as shard_db:
+        comments = await comments_with_archive(
+            shard_db, COMMENT_READ_FIELDS, lambda table: table.c.posht_id == posht_id
+        )
+        result = await shard_db.execute(
+            select(comments).order_by(comments.c.created_at, comments.c.id)
+        )
+        return rows_to_dicts(COMMENT_READ_FIELDS, result.all())
+
+
+async def _insert_comment(db: AsyncSession, values: dict[str, Any]) -> Comment:
+    """Insert a comment unless its posht is gone; 404 if it is.
+
+    The liveness check is part of the INSERT, so a posht soft-deleted after
+    ``create_comment`` looked at it cannot gain comments the purger would
+    then have to race. ``db`` must be on the posht's shard.
+    """
+    comment_id = await shards.allocate_id(db, Comment.__table__)
+    if comment_id is not None:
+        values = {**values, "id": comment_id}
+    columns = list(values)
+    live_posht = select(
+        *(literal(values[name], Comment.__table__.c[name].type) for name in columns)
+    ).where(
+        exists().where(Posht.id == values["posht_id"], posht_is_live()),
+    )
+    new_comment = await db.scalar(
+        insert(Comment).from_select(columns, live_posht).returning(Comment)
+    )
+    if new_comment is None:
+        raise HTTPException(status_code=404, detail="Posht not found")
+    auto = int(bool(values.get("auto_created")))
+    if not auto:
+        await record_comment(db, values["posht_id"], blocked=int(values["is_blocked"]))
+    await record_rollup(
+        db,
+        new_comment.created_at,
+        new_comment.posht_id,
+        new_comment.user_id,
+        blocked=int(values["is_blocked"]),
+        auto=auto,
+    )
+    await record_event(db, "comment", new_comment, "created")
     return new_comment
 
 
-async def create_auto_reply(db: AsyncSession, comment: Comment) -> None:
-    logger.info("create_auto_reply is running!")
-    posht = await db.get(Posht, comment.posht_id)
-    if not posht:
-        return
+async def create_comment(db: AsyncSession, comment: CommentCreate) -> Comment:
+    shard = await shards.locate(db, Posht.__table__, comment.posht_id)
+    async with shards.session(db, shard) as posht_db:
+        posht_id = await posht_db.scalar(
+            select(Posht.id).where(Posht.id == comment.posht_id, posht_is_live())
+        )
+        # End the read transaction so the model call does not hold a snapshot.
+        await posht_db.commit()
+    if posht_id is None:
+        raise HTTPException(status_code=404, detail="Posht not found")
 
-    posth_author = await db.get(User, posht.user_id)
-    if (
-        not posth_author
-        or posth_author.auto_comment_delay is None
-        or posth_author.auto_comment_delay < 0
-    ):
-        return
+    match = comment_index.lookup(comment.comment_text, comment.user_id)
+    if match.blocked:
+        logger.info("Comment is a near-duplicate of a blocked one, skipping AI check")
+        is_blocked = True
+    else:
+        is_blocked = await check_for_profanity(comment.comment_text)
+    comment_index.add(comment.comment_text, comment.user_id, is_blocked)
+
+    values = {**comment.model_dump(), "is_blocked": is_blocked}
+    if GROUP_COMMIT_ENABLED:
+        writer = writer_for_shard(shard) if shard else comment_writer
+        new_comment = await writer.submit(
+            lambda session: _insert_comment(session, values)
+        )
+        # The writer committed on its own session, which knows no client.
+        remember_writer(db.info)
+    else:
+        async with shards.session(db, shard) as shard_db:
+            new_comment = await _insert_comment(shard_db, values)
+            await shard_db.commit()
 
-    await asyncio.sleep(posth_author.auto_comment_delay)
+    if not is_blocked and not match.flood:
+        auto_reply_scheduler.schedule(new_comment.posht_id, new_comment.comment_text)
 
-    reply_text = await create_auto_reply_text(posht.posht_text, comment.comment_text)
+    return new_comment
 
-    auto_comment = Comment(
-        posht_id=comment.posht_id,
-        comment_text=reply_text,
-        user_id=posht.user_id,
-        auto_created=True,
-    )
-    db.add(auto_comment)
-    await db.commit()
+
+async def _auto_reply_delay(posht_id: int) -> float | None:
+    """Seconds to collect comments before replying, or None for no reply."""
+    async with SessionLocal() as db:
+        shard = await shards.locate(db, Posht.__table__, posht_id)
+        async with shards.session(db, shard) as posht_db:
+            posht = await hot_cache.get(posht_db, Posht, posht_id)
+        if posht is None or posht.deleted_at is not None:
+            return None
+        author = await hot_cache.get(db, User, posht.user_id)
+    delay = author.auto_comment_delay if author else None
+    return None if delay is None or delay < 0 else delay
+
+
+async def create_auto_reply(posht_id: int, comments: list[str]) -> None:
+    """Answer a batch of comments on a posht with one generated comment."""
+    logger.info("create_auto_reply is running!")
+    async with SessionLocal() as primary:
+        shard = await shards.locate(primary, Posht.__table__, posht_id)
+        async with shards.session(primary, shard) as db:
+            posht = await hot_cache.get(db, Posht, posht_id)
+            if not posht or posht.deleted_at is not None:
+                return
+            comment_text = (
+                comments[0]
+                if len(comments) == 1
+                else "\n".join(f"{n}. {text}" for n, text in enumerate(comments, 1))
+            )
+            reply_text = await create_auto_reply_text(posht.posht_text, comment_text)
+            await _insert_comment(
+                db,
+                {
+                    "posht_id": posht_id,
+                    "comment_text": reply_text,
+                    "user_id": posht.user_id,
+                    "is_blocked": False,
+                    "auto_created": True,
+                },
+            )
+            await db.commit()
+
+
+auto_reply_scheduler = AutoReplyScheduler(
+    _auto_reply_delay,
+    create_auto_reply,
+    top_k=AUTO_REPLY_TOP_K,
+    max_per_hour=AUTO_REPLY_MAX_PER_HOUR,
+)
 
 
 async def create_auto_reply_text(post_text: str, comment_text: str) -> str:
     logger.info("create_auto_reply_text is running!")
 
     try:
-        response = model.generate_content(PROMPT_FOR_AUTO_REPLY)
-        reply = response.text.strip()
+        response = await auto_reply_client.generate(
+            render_prompt(
+                PROMPT_FOR_AUTO_REPLY, post_text=post_text, comment_text=comment_text
+            )
+        )
+        reply = response.strip()
         logger.info("Generated reply:", repr(reply))
         return reply
     except Exception as e:
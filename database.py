@@ -1,7 +1,16 @@
-from typing import AsyncGenerator
+import itertools
+import time
+from collections import OrderedDict
+from typing import AsyncGenerator, Callable
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from config import DATABASE_READ_URLS, READ_YOUR_WRITES_SECONDS, SQLITE_BUSY_TIMEOUT
+from security import subject_from_headers
 
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./messcomm.db"
 
@@ -11,6 +20,108 @@ SessionLocal = sessionmaker(
 )
 
 
-async def get_db() -> AsyncGenerator:
+def read_only_url(url: str) -> str:
+    """The same SQLite file opened through read-only URI connections."""
+    return f"sqlite+aiosqlite:///file:{make_url(url).database}?mode=ro&uri=true"
+
+
+def _set_wal(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT * 1000)}")
+    cursor.close()
+
+
+def enable_wal(async_engine: AsyncEngine) -> None:
+    """WAL lets read-only connections read while a write is in progress.
+
+    Writers still take turns; the busy timeout lets a queued one wait for
+    the lock instead of failing with "database is locked".
+    """
+    event.listen(async_engine.sync_engine, "connect", _set_wal)
+
+
+enable_wal(engine)
+
+read_engines = [
+    create_async_engine(url, echo=True, future=True)
+    for url in DATABASE_READ_URLS or [read_only_url(SQLALCHEMY_DATABASE_URL)]
+]
+ReadSessionLocals = [
+    sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+    for read_engine in read_engines
+]
+_next_read_session = itertools.cycle(ReadSessionLocals).__next__
+
+
+class ReadYourWrites:
+    """Clients that wrote recently, whose reads must go to the primary."""
+
+    def __init__(
+        self,
+        window: float = READ_YOUR_WRITES_SECONDS,
+        max_entries: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window = window
+        self.max_entries = max_entries
+        self.clock = clock
+        self._until: OrderedDict[str, float] = OrderedDict()
+
+    def mark(self, key: str) -> None:
+        self._until[key] = self.clock() + self.window
+        self._until.move_to_end(key)
+        while len(self._until) > self.max_entries:
+            self._until.popitem(last=False)
+
+    def is_sticky(self, key: str) -> bool:
+        until = self._until.get(key)
+        if until is None:
+            return False
+        if until <= self.clock():
+            del self._until[key]
+            return False
+        return True
+
+    def clear(self) -> None:
+        self._until.clear()
+
+
+read_your_writes = ReadYourWrites()
+
+
+def client_key(request: Request) -> str:
+    subject = subject_from_headers(request.scope["headers"])
+    if subject is not None:
+        return f"user:{subject}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def remember_writer(info: dict) -> None:
+    """Pin the client in a session's ``info`` to the primary for a while."""
+    key = info.get("client_key")
+    if key is not None:
+        read_your_writes.mark(key)
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session: Session) -> None:
+    remember_writer(session.info)
+
+
+def read_session_factory(key: str) -> sessionmaker:
+    if read_your_writes.is_sticky(key):
+        return SessionLocal
+    return _next_read_session()
+
+
+async def get_read_db(request: Request) -> AsyncGenerator:
+    """A replica session, or the primary if this client has just written."""
+    async with read_session_factory(client_key(request))() as session:
+        yield session
+
+
+async def get_write_db(request: Request) -> AsyncGenerator:
     async with SessionLocal() as session:
+        session.info["client_key"] = client_key(request)
         yield session
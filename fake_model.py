@@ -0,0 +1,143 @@
+"""Scriptable stand-in for the hosted model, for tests and benchmarks.
+
+Serve it and point the app at it through the llama.cpp provider:
+
+    python -m fake_model --port 8080 --latency 0.5 --error-rate 0.01
+    MODERATION_PROVIDER=llamacpp LLAMACPP_URL=http://127.0.0.1:8080 uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import math
+import random
+from typing import Any, Callable
+
+from fastapi import Body, FastAPI, HTTPException
+from pydantic import BaseModel
+
+from ai_providers import RulesProvider
+
+Latency = Callable[[random.Random], float]
+
+
+def fixed(seconds: float) -> Latency:
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Latency:
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5) -> Latency:
+    """Long-tailed latency like a hosted model's: mostly ``median``, some slow."""
+    return lambda rng: median * math.exp(rng.gauss(0, sigma))
+
+
+class FakeModelError(RuntimeError):
+    """A failure injected by ``FakeModel``."""
+
+
+class FakeModel(RulesProvider):
+    """``RulesProvider`` with scripted verdicts, latency and injected failures.
+
+    ``verdicts`` maps substrings to a verdict: the first one found in a text
+    decides, and the word list covers the rest. Each call sleeps for a draw
+    from ``latency`` times ``time_scale``, so a slow model can be replayed
+    quickly. ``error_rate`` fails calls at random and ``fail_next`` fails
+    the next few outright.
+    """
+
+    def __init__(
+        self,
+        verdicts: dict[str, bool] | None = None,
+        latency: Latency = fixed(0),
+        error_rate: float = 0.0,
+        time_scale: float = 1.0,
+        seed: int = 0,
+    ) -> None:
+        super().__init__()
+        self.name = "fake"
+        self.verdicts = dict(verdicts or {})
+        self.latency = latency
+        self.error_rate = error_rate
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+        self.failures_left = 0
+        self.calls = 0
+        self.errors = 0
+        self.inflight = 0
+        self.peak_inflight = 0
+
+    def fail_next(self, count: int = 1) -> None:
+        self.failures_left += count
+
+    def is_blocked(self, text: str) -> bool:
+        for needle, verdict in self.verdicts.items():
+            if needle in text:
+                return verdict
+        return super().is_blocked(text)
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        self.inflight += 1
+        self.peak_inflight = max(self.peak_inflight, self.inflight)
+        try:
+            await asyncio.sleep(self.latency(self.rng) * self.time_scale)
+            if self.failures_left:
+                self.failures_left -= 1
+                raise FakeModelError("injected failure")
+            if self.rng.random() < self.error_rate:
+                raise FakeModelError("injected random failure")
+            return await super().generate(prompt)
+        except FakeModelError:
+            self.errors += 1
+            raise
+        finally:
+            self.inflight -= 1
+
+
+class Completion(BaseModel):
+    prompt: str
+
+
+def fake_model_app(model: FakeModel) -> FastAPI:
+    """HTTP front for ``model``: llama.cpp ``/completion`` and Gemini REST."""
+    app = FastAPI()
+
+    async def answer(prompt: str) -> str:
+        try:
+            return await model.generate(prompt)
+        except FakeModelError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+
+    @app.post("/completion")
+    async def completion(request: Completion) -> dict[str, str]:
+        return {"content": await answer(request.prompt)}
+
+    @app.post("/v1beta/models/{model_name}:generateContent")
+    async def generate_content(
+        model_name: str, body: dict[str, Any] = Body(...)
+    ) -> dict[str, Any]:
+        prompt = "".join(
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        text = await answer(prompt)
+        return {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]
+        }
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.05, help="median seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    model = FakeModel(latency=lognormal(args.latency), error_rate=args.error_rate)
+    uvicorn.run(fake_model_app(model), host="127.0.0.1", port=args.port)
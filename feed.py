@@ -0,0 +1,208 @@
+import base64
+import heapq
+import math
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import case, delete, false, func, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from archive import archived_partitions
+from config import FEED_BLOCKED_PENALTY, FEED_DECAY_SECONDS
+from loguru import logger
+from models import Comment, Posht, PoshtScore
+from sharding import shards
+
+logger.add("loguru/feed.log")
+
+FEED_FIELDS = ("id", "title", "posht_text", "created_at", "user_id", "is_blocked")
+
+
+def score_base(created_at: datetime | None) -> float:
+    """Age term of the score: newer poshts start higher and never need re-aging.
+
+    Ranking by ``log10(engagement) + created / DECAY`` orders poshts exactly as
+    ``engagement * 10 ** (-age / DECAY)`` would, but the stored score only
+    changes when engagement does, so it can live in an index.
+    """
+    if created_at is None:
+        created_at = datetime.now(timezone.utc)
+    elif created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.timestamp() / FEED_DECAY_SECONDS
+
+
+def hot_score(base: float, comment_count: int, blocked_count: int) -> float:
+    blocked_ratio = blocked_count / comment_count if comment_count else 0.0
+    engagement = 1 + comment_count - blocked_count
+    return math.log10(engagement) - FEED_BLOCKED_PENALTY * blocked_ratio + base
+
+
+async def track_posht(
+    db: AsyncSession,
+    posht_id: int,
+    created_at: datetime | None = None,
+    has_comments: bool = True,
+) -> None:
+    """Put a visible posht into the feed; a no-op if it is already there.
+
+    A posht coming back from being blocked is scored from its comments,
+    counting the ones ``record_comment`` skipped while it was out of the feed.
+    """
+    counts = (0, 0)
+    if has_comments:
+        tracked = await db.scalar(
+            select(PoshtScore.posht_id).where(PoshtScore.posht_id == posht_id)
+        )
+        if tracked is not None:
+            return
+        counts = await comment_counts(db, posht_id)
+    base = score_base(created_at)
+    stmt = sqlite_insert(PoshtScore).values(
+        posht_id=posht_id,
+        score=hot_score(base, *counts),
+        base=base,
+        comment_count=counts[0],
+        blocked_count=counts[1],
+    )
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=["posht_id"]))
+
+
+async def comment_counts(db: AsyncSession, posht_id: int) -> tuple[int, int]:
+    """A posht's comment and blocked counts, archived comments included."""
+    comment_count = blocked_count = 0
+    for table in (Comment.__table__, *await archived_partitions(db)):
+        result = await db.execute(
+            select(
+                func.count(),
+                func.sum(case((table.c.is_blocked.is_(True), 1), else_=0)),
+            ).where(table.c.posht_id == posht_id, table.c.auto_created.is_not(True))
+        )
+        count, blocked = result.one()
+        comment_count += count
+        blocked_count += blocked or 0
+    return comment_count, blocked_count
+
+
+async def untrack_posht(db: AsyncSession, posht_id: int) -> None:
+    await db.execute(delete(PoshtScore).where(PoshtScore.posht_id == posht_id))
+
+
+async def record_comment(
+    db: AsyncSession, posht_id: int, comments: int = 1, blocked: int = 0
+) -> None:
+    """Bump a posht's counters and rescore it in the caller's transaction."""
+    result = await db.execute(
+        update(PoshtScore)
+        .where(PoshtScore.posht_id == posht_id)
+        .values(
+            comment_count=PoshtScore.comment_count + comments,
+            blocked_count=PoshtScore.blocked_count + blocked,
+        )
+        .returning(PoshtScore.base, PoshtScore.comment_count, PoshtScore.blocked_count)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return
+    await db.execute(
+        update(PoshtScore)
+        .where(PoshtScore.posht_id == posht_id)
+        .values(score=hot_score(*row))
+    )
+
+
+async def backfill_scores(db: AsyncSession) -> int:
+    """Score visible poshts that predate the feed; existing rows are kept."""
+    stats = (
+        select(
+            Comment.posht_id,
+            func.count().label("comment_count"),
+            func.sum(case((Comment.is_blocked.is_(True), 1), else_=0)).label(
+                "blocked_count"
+            ),
+        )
+        .where(Comment.auto_created.is_not(True))
+        .group_by(Comment.posht_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(Posht.id, Posht.created_at, stats.c.comment_count, stats.c.blocked_count)
+        .outerjoin(stats, stats.c.posht_id == Posht.id)
+        .outerjoin(PoshtScore, PoshtScore.posht_id == Posht.id)
+        .where(
+            PoshtScore.posht_id.is_(None),
+            Posht.deleted_at.is_(None),
+            Posht.is_blocked == false(),
+        )
+    )
+    rows = []
+    for posht_id, created_at, comment_count, blocked_count in result.all():
+        base = score_base(created_at)
+        comment_count, blocked_count = comment_count or 0, blocked_count or 0
+        rows.append(
+            {
+                "posht_id": posht_id,
+                "base": base,
+                "score": hot_score(base, comment_count, blocked_count),
+                "comment_count": comment_count,
+                "blocked_count": blocked_count,
+            }
+        )
+    if rows:
+        await db.execute(sqlite_insert(PoshtScore), rows)
+        await db.commit()
+        logger.info(f"Backfilled feed scores for {len(rows)} poshts")
+    return len(rows)
+
+
+def encode_cursor(score: float, posht_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{score!r}:{posht_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        score, posht_id = base64.urlsafe_b64decode(cursor).decode().split(":")
+        return float(score), int(posht_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def read_feed(
+    db: AsyncSession, limit: int, cursor: str | None = None
+) -> dict[str, Any]:
+    """One page of the feed as a backwards range scan over the score index.
+
+    Every shard scans its own index from the cursor and the pages are merged,
+    so a page costs ``limit + 1`` index rows per shard.
+    """
+    query = (
+        select(
+            PoshtScore.score,
+            PoshtScore.comment_count,
+            *(getattr(Posht, name) for name in FEED_FIELDS),
+        )
+        .join(Posht, Posht.id == PoshtScore.posht_id)
+        .order_by(PoshtScore.score.desc(), PoshtScore.posht_id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        score, posht_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(PoshtScore.score, PoshtScore.posht_id) < tuple_(score, posht_id)
+        )
+
+    async def shard_page(session: AsyncSession) -> list[dict[str, Any]]:
+        return [dict(row._mapping) for row in (await session.execute(query)).all()]
+
+    pages = await shards.scatter(db, shard_page)
+    rows = list(
+        heapq.merge(*pages, key=lambda row: (row["score"], row["id"]), reverse=True)
+    )
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["score"], last["id"])
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,127 @@
+import asyncio
+from typing import Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import GROUP_COMMIT_DELAY_MS, GROUP_COMMIT_MAX_BATCH
+from database import SessionLocal
+from loguru import logger
+from sharding import shards
+from task_supervisor import TaskRejected, TaskSupervisor, task_supervisor
+
+logger.add("loguru/group_commit.log")
+
+T = TypeVar("T")
+Work = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class GroupCommitWriter:
+    """Runs small writes submitted within a few milliseconds in one transaction.
+
+    SQLite pays one fsync per commit, so N concurrent inserts cost one commit
+    instead of N. If any write in a batch fails, the batch is rolled back and
+    each write is retried in its own transaction so only the bad one fails.
+    The flusher runs in the supervisor's ``group``; ``close`` commits what is
+    still queued before stopping it.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        max_delay: float = GROUP_COMMIT_DELAY_MS / 1000,
+        max_batch: int = GROUP_COMMIT_MAX_BATCH,
+        supervisor: TaskSupervisor = task_supervisor,
+        group: str = "group_commit",
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.supervisor = supervisor
+        self.group = group
+        self._queue: asyncio.Queue[tuple[Work, asyncio.Future]] = asyncio.Queue()
+        self._flusher: asyncio.Task | None = None
+        self.batches = 0
+        self.writes = 0
+
+    async def submit(self, work: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        future = asyncio.get_running_loop().create_future()
+        if self._flusher is None or self._flusher.done():
+            try:
+                self._flusher = self.supervisor.spawn(
+                    self.group, self._run(), name="group-commit"
+                )
+            except TaskRejected:
+                # Shutting down: commit this write on its own.
+                await self._flush_one(work, future)
+                return await future
+        await self._queue.put((work, future))
+        return await future
+
+    async def close(self) -> None:
+        """Commit every queued write, then stop the flusher."""
+        if self._flusher is None:
+            return
+        if not self._flusher.done():
+            await self._queue.join()
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _flush(self, batch: list[tuple[Work, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.writes += len(batch)
+        try:
+            async with self.session_factory() as db:
+                results = [await work(db) for work, _ in batch]
+                await db.commit()
+        except Exception as e:
+            logger.info(f"Group commit of {len(batch)} writes failed, retrying: {e}")
+            for item in batch:
+                await self._flush_one(*item)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _flush_one(self, work: Work, future: asyncio.Future) -> None:
+        try:
+            async with self.session_factory() as db:
+                result = await work(db)
+                await db.commit()
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+
+comment_writer = GroupCommitWriter(SessionLocal)
+# Writers for shards 1..N-1, created on first use; see sharding.py.
+shard_writers: dict[int, GroupCommitWriter] = {}
+
+
+def writer_for_shard(shard: int) -> GroupCommitWriter:
+    if shard not in shard_writers:
+        shard_writers[shard] = GroupCommitWriter(shards.sessions[shard])
+    return shard_writers[shard]
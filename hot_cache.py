@@ -0,0 +1,278 @@
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Callable
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+
+from config import HOT_CACHE_CHECK_SECONDS, HOT_CACHE_MAX_BYTES
+from loguru import logger
+from models import CacheVersion, Posht, User
+from sharding import shard_of
+
+logger.add("loguru/hot_cache.log")
+
+PENDING = "hot_cache_pending"
+BUMPED = "hot_cache_bumped"
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    id: int  # noqa: VNE003
+    email: str
+    role: str
+    auto_comment_delay: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class PoshtSnapshot:
+    id: int  # noqa: VNE003
+    title: str
+    posht_text: str
+    created_at: datetime | None
+    user_id: int
+    is_blocked: bool | None
+    deleted_at: datetime | None
+    version: int
+
+
+SNAPSHOTS = {User: UserSnapshot, Posht: PoshtSnapshot}
+MODELS_BY_TABLE = {model.__tablename__: model for model in SNAPSHOTS}
+
+
+def version_key(kind: str, shard: int) -> str:
+    """Shards keep their own ``cache_versions``; shard 0's keys are the kinds."""
+    return f"{kind}:{shard}" if shard else kind
+
+
+def snapshot_size(snapshot: Any) -> int:
+    return sys.getsizeof(snapshot) + sum(
+        sys.getsizeof(getattr(snapshot, field.name)) for field in fields(snapshot)
+    )
+
+
+class HotObjectCache:
+    """Bounded LRU of immutable ``User`` and ``Posht`` snapshots.
+
+    Commits in this process drop the rows they touched. Every such commit
+    also bumps the table's counter in ``cache_versions``, and at most every
+    ``check_seconds`` the cache compares those counters with the ones it
+    last saw, so a write made by another worker drops that table's entries.
+    Each shard has its own counters, checked when a read goes to that shard.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = HOT_CACHE_MAX_BYTES,
+        check_seconds: float = HOT_CACHE_CHECK_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.check_seconds = check_seconds
+        self.clock = clock
+        self._entries: OrderedDict[tuple[str, int], tuple[Any, int]] = OrderedDict()
+        self.versions: dict[str, int] = {}
+        self._epoch = 0
+        self._checked_at: dict[int, float] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    async def get(self, db: AsyncSession, model: type, key: int) -> Any | None:
+        await self._validate(db)
+        entry = self._entries.get((model.__tablename__, key))
+        if entry is not None:
+            self._entries.move_to_end((model.__tablename__, key))
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        # An invalidation while loading means the row read may be stale.
+        epoch = self._epoch
+        snapshot_class = SNAPSHOTS[model]
+        result = await db.execute(
+            select(
+                *(getattr(model, field.name) for field in fields(snapshot_class))
+            ).where(model.id == key)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        snapshot = snapshot_class(*row)
+        if epoch == self._epoch:
+            self._store((model.__tablename__, key), snapshot)
+        return snapshot
+
+    async def _validate(self, db: AsyncSession) -> None:
+        now = self.clock()
+        shard = shard_of(db)
+        checked_at = self._checked_at.get(shard)
+        if checked_at is not None and now - checked_at < self.check_seconds:
+            return
+        self._checked_at[shard] = now
+        result = await db.execute(select(CacheVersion.kind, CacheVersion.version))
+        for kind, version in result.all():
+            key = version_key(kind, shard)
+            if self.versions.get(key, 0) != version:
+                self.versions[key] = version
+                self._drop(kind)
+
+    def _store(self, key: tuple[str, int], snapshot: Any) -> None:
+        size = snapshot_size(snapshot)
+        if size > self.max_bytes:
+            return
+        self._discard(key)
+        self._entries[key] = (snapshot, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def _discard(self, key: tuple[str, int]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def _drop(self, kind: str, ids: set[int] | None = None) -> None:
+        self._epoch += 1
+        self.invalidations += 1
+        if ids is None:
+            ids = {key for entry_kind, key in self._entries if entry_kind == kind}
+        for key in ids:
+            self._discard((kind, key))
+
+    def committed(
+        self,
+        pending: dict[str, set[int] | None],
+        bumped: dict[str, int],
+        shard: int = 0,
+    ) -> None:
+        """Drop what a commit changed and adopt its counters if nobody else moved."""
+        for kind, ids in pending.items():
+            self._drop(kind, ids)
+            key = version_key(kind, shard)
+            version = bumped.get(kind)
+            if version is not None and version == self.versions.get(key, 0) + 1:
+                self.versions[key] = version
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.versions.clear()
+        self._checked_at.clear()
+        self.bytes = 0
+
+
+hot_cache = HotObjectCache()
+
+
+def _mark(session: Session, model: type, ids: set[int] | None) -> None:
+    pending = session.info.setdefault(PENDING, {})
+    kind = model.__tablename__
+    if ids is None or pending.get(kind, set()) is None:
+        pending[kind] = None
+    else:
+        pending.setdefault(kind, set()).update(ids)
+
+
+def _id_values(clause: Any, model: type) -> set[int] | None:
+    """The ids in an ``id == x`` or ``id IN (...)`` condition, else None."""
+    if not isinstance(clause, BinaryExpression):
+        return None
+    column, value = clause.left, clause.right
+    table = getattr(column, "table", None)
+    if getattr(table, "name", None) != model.__tablename__ or column.key != "id":
+        return None
+    if not isinstance(value, BindParameter):
+        return None
+    if clause.operator is operators.eq:
+        return {value.effective_value}
+    if clause.operator is operators.in_op:
+        return set(value.effective_value)
+    return None
+
+
+def statement_ids(state: ORMExecuteState, model: type) -> set[int] | None:
+    """Ids an UPDATE or DELETE touches, or None when they can't be told."""
+    if isinstance(state.parameters, list):
+        ids = {params.get("id") for params in state.parameters}
+        return None if None in ids else ids
+    where = state.statement.whereclause
+    if isinstance(where, BooleanClauseList) and where.operator is operators.and_:
+        conditions = where.clauses
+    else:
+        conditions = [where]
+    for condition in conditions:
+        ids = _id_values(condition, model)
+        if ids is not None:
+            return ids
+    return None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context: Any) -> None:
+    for obj in (*session.dirty, *session.deleted):
+        if type(obj) in SNAPSHOTS:
+            _mark(session, type(obj), {obj.id})
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statement(state: ORMExecuteState) -> None:
+    if not (state.is_update or state.is_delete):
+        return
+    model = MODELS_BY_TABLE.get(state.statement.table.name)
+    if model is not None:
+        _mark(state.session, model, statement_ids(state, model))
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session: Session) -> None:
+    # Commit flushes after this hook; flush first so its changes are marked.
+    session.flush()
+    pending = session.info.get(PENDING)
+    if not pending:
+        return
+    stmt = sqlite_insert(CacheVersion).values(
+        [{"kind": kind, "version": 1} for kind in pending]
+    )
+    result = session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["kind"], set_={"version": CacheVersion.version + 1}
+        ).returning(CacheVersion.kind, CacheVersion.version)
+    )
+    session.info[BUMPED] = dict(result.all())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate(session: Session) -> None:
+    pending = session.info.pop(PENDING, None)
+    bumped = session.info.pop(BUMPED, {})
+    if pending:
+        hot_cache.committed(pending, bumped, session.info.get("shard", 0))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(PENDING, None)
+    session.info.pop(BUMPED, None)
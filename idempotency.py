@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import re
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL
+from loguru import logger
+from security import subject_from_headers
+
+logger.add("loguru/idempotency.log")
+
+IDEMPOTENT_ROUTES = (
+    ("POST", re.compile(r"^/comments/?$")),
+    ("POST", re.compile(r"^/poshts/?$")),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResponse:
+    expires: float
+    request_hash: bytes
+    status_code: int
+    headers: tuple[tuple[bytes, bytes], ...]
+    body: bytes
+
+    def to_response(self) -> Response:
+        response = Response(zlib.decompress(self.body), status_code=self.status_code)
+        response.raw_headers = [*self.headers, (b"idempotent-replayed", b"true")]
+        return response
+
+
+class IdempotencyStore:
+    """Response snapshots keyed by sha256(key, user, route), oldest first.
+
+    Every entry has the same TTL, so insertion order is expiry order and
+    eviction only ever looks at the front of the dict.
+    """
+
+    def __init__(
+        self,
+        ttl: float = IDEMPOTENCY_TTL,
+        max_entries: int = IDEMPOTENCY_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: OrderedDict[bytes, StoredResponse] = OrderedDict()
+        self._inflight: dict[bytes, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: bytes) -> StoredResponse | None:
+        self.evict()
+        return self._entries.get(key)
+
+    def put(
+        self,
+        key: bytes,
+        request_hash: bytes,
+        status_code: int,
+        headers: Iterable[tuple[bytes, bytes]],
+        body: bytes,
+    ) -> None:
+        self._entries[key] = StoredResponse(
+            self.clock() + self.ttl,
+            request_hash,
+            status_code,
+            tuple(headers),
+            zlib.compress(body),
+        )
+        self._entries.move_to_end(key)
+        self.evict()
+
+    def evict(self) -> None:
+        now = self.clock()
+        entries = self._entries
+        while entries:
+            oldest = next(iter(entries.values()))
+            if oldest.expires > now and len(entries) <= self.max_entries:
+                break
+            entries.popitem(last=False)
+
+    async def wait_inflight(self, key: bytes) -> None:
+        while (inflight := self._inflight.get(key)) is not None:
+            await asyncio.shield(inflight)
+
+    def begin(self, key: bytes) -> None:
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+
+    def end(self, key: bytes) -> None:
+        self._inflight.pop(key).set_result(None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+
+
+def _header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _client(scope: Scope) -> str:
+    """Keys are scoped per user, or per client address when unauthenticated."""
+    user_id = subject_from_headers(scope["headers"])
+    if user_id is not None:
+        return f"user:{user_id}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response for a repeated ``Idempotency-Key``.
+
+    Only successful responses are stored, so a retry after an error runs the
+    request again. A duplicate that arrives while the first request is still
+    running waits for it instead of running in parallel.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: IdempotencyStore,
+        routes: Iterable[tuple[str, re.Pattern]] = IDEMPOTENT_ROUTES,
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.routes = tuple(routes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        idempotency_key = None
+        if scope["type"] == "http" and any(
+            method == scope["method"] and path.match(scope["path"])
+            for method, path in self.routes
+        ):
+            idempotency_key = _header(scope, b"idempotency-key")
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+
+        body, receive = await self._read_body(receive)
+        key = hashlib.sha256(
+            f"{idempotency_key}\0{_client(scope)}\0{scope['method']}\0"
+            f"{scope['path']}".encode()
+        ).digest()
+        request_hash = hashlib.sha256(body).digest()
+
+        await self.store.wait_inflight(key)
+        stored = self.store.get(key)
+        if stored is not None:
+            if stored.request_hash != request_hash:
+                response = JSONResponse(
+                    {"detail": "Idempotency-Key was already used for another request"},
+                    status_code=422,
+                )
+            else:
+                logger.info(f"Replaying idempotent {scope['method']} {scope['path']}")
+                response = stored.to_response()
+            await response(scope, receive, send)
+            return
+
+        self.store.begin(key)
+        try:
+            await self._run_and_store(scope, receive, send, key, request_hash)
+        finally:
+            self.store.end(key)
+
+    async def _run_and_store(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        key: bytes,
+        request_hash: bytes,
+    ) -> None:
+        status_code = 500
+        headers: list[tuple[bytes, bytes]] = []
+        chunks: list[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive, capture)
+        if 200 <= status_code < 300:
+            self.store.put(key, request_hash, status_code, headers, b"".join(chunks))
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> tuple[bytes, Receive]:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        sent = False
+
+        async def replay() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return body, replay
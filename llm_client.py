@@ -0,0 +1,115 @@
+import asyncio
+import random
+import time
+
+from ai_providers import (
+    HedgedProvider,
+    LatencyStats,
+    ModelProvider,
+    auto_reply_provider,
+    moderation_provider,
+)
+from config import LLM_DEADLINE, LLM_HEDGE, LLM_MAX_CONCURRENCY, LLM_RETRIES
+from loguru import logger
+
+logger.add("loguru/llm_client.log")
+
+
+class ModelCallError(Exception):
+    """A model call failed after all retries or ran past its deadline."""
+
+
+class _Bounded:
+    """Provider view that holds a concurrency slot and records latency."""
+
+    def __init__(self, client: "LLMClient") -> None:
+        self.client = client
+        self.name = client.provider.name
+
+    async def generate(self, prompt: str) -> str:
+        async with self.client.semaphore:
+            started = time.perf_counter()
+            try:
+                text = await self.client.provider.generate(prompt)
+            except asyncio.CancelledError:
+                # A cancelled hedge loser says nothing about latency or errors.
+                raise
+            except Exception:
+                self.client.stats.record(time.perf_counter() - started, False)
+                raise
+            self.client.stats.record(time.perf_counter() - started, True)
+            return text
+
+
+class LLMClient:
+    """Deadline, retries, bounded concurrency and hedging around a provider.
+
+    Once ``hedge_min_samples`` calls have been seen, an attempt that is still
+    running after the observed p95 latency gets a duplicate request, and the
+    first answer wins. Errors are retried with jittered exponential backoff
+    until ``deadline`` seconds have passed since the call started.
+    """
+
+    def __init__(
+        self,
+        provider: ModelProvider,
+        deadline: float = LLM_DEADLINE,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        retries: int = LLM_RETRIES,
+        hedge: bool = LLM_HEDGE,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        hedge_min_samples: int = 20,
+    ) -> None:
+        self.provider = provider
+        self.deadline = deadline
+        self.retries = retries
+        self.hedge = hedge
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_min_samples = hedge_min_samples
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.stats = LatencyStats()
+        self._bounded = _Bounded(self)
+
+    def hedge_delay(self) -> float | None:
+        if not self.hedge or self.stats.calls < self.hedge_min_samples:
+            return None
+        return self.stats.percentile(0.95)
+
+    async def generate(self, prompt: str) -> str:
+        try:
+            async with asyncio.timeout(self.deadline):
+                return await self._generate_with_retries(prompt)
+        except TimeoutError as e:
+            # Latency samples are per attempt. The one the deadline cancelled
+            # has none, so the miss only counts as an error.
+            self.stats.record_error()
+            raise ModelCallError(
+                f"{self.provider.name} missed the {self.deadline}s deadline"
+            ) from e
+
+    async def _generate_with_retries(self, prompt: str) -> str:
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._attempt(prompt)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise ModelCallError(
+                        f"{self.provider.name} failed after {attempt + 1} attempts"
+                    ) from e
+                backoff = min(self.backoff_max, self.backoff_base * 2**attempt)
+                logger.info(f"{self.provider.name} attempt {attempt + 1} failed: {e}")
+                await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+        raise AssertionError("unreachable")
+
+    async def _attempt(self, prompt: str) -> str:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._bounded.generate(prompt)
+        hedged = HedgedProvider([self._bounded, self._bounded], hedge_delay=delay)
+        return await hedged.generate(prompt)
+
+
+moderation_client = LLMClient(moderation_provider)
+auto_reply_client = LLMClient(auto_reply_provider)